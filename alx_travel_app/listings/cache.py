@@ -0,0 +1,20 @@
+from django.core.cache import cache
+from django.db import transaction
+
+# Bump when the listing detail representation changes shape
+LISTING_DETAIL_SCHEMA_VERSION = 1
+LISTING_DETAIL_TIMEOUT = 60
+
+
+def listing_detail_cache_key(listing_id):
+    return f'listing:{listing_id}:detail:v{LISTING_DETAIL_SCHEMA_VERSION}'
+
+
+def invalidate_listing_detail(*listing_ids):
+    """
+    Drop cached listing details once the current transaction commits, so a
+    concurrent read can't re-cache the pre-commit state.
+    """
+    keys = [listing_detail_cache_key(listing_id) for listing_id in listing_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
+from listings.cache import invalidate_listing_detail
+from listings.models import Listing
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized listing rating aggregates from their reviews'
+
+    def handle(self, *args, **options):
+        # One GROUP BY over all reviews; only listings that drifted are written
+        listings = Listing.objects.only('id', 'rating_sum', 'review_count').annotate(
+            total_rating=Coalesce(Sum('reviews__rating'), Value(0)),
+            total_reviews=Count('reviews'),
+        ).exclude(
+            rating_sum=F('total_rating'),
+            review_count=F('total_reviews'),
+        )
+
+        stale = []
+        for listing in listings:
+            listing.rating_sum = listing.total_rating
+            listing.review_count = listing.total_reviews
+            stale.append(listing)
+
+        Listing.objects.bulk_update(stale, ['rating_sum', 'review_count'], batch_size=500)
+        # bulk_update sends no signals, so drop cached details explicitly
+        invalidate_listing_detail(*[listing.pk for listing in stale])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated rating aggregates for {len(stale)} listings')
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-14 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    listings = Listing.objects.annotate(
+        total_rating=Sum('reviews__rating'),
+        total_reviews=Count('reviews'),
+    ).filter(total_reviews__gt=0)
+
+    for listing in listings:
+        listing.rating_sum = listing.total_rating
+        listing.review_count = listing.total_reviews
+
+    Listing.objects.bulk_update(listings, ['rating_sum', 'review_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_listing_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
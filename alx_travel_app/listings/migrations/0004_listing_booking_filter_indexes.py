@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-14 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_backfill_listing_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['check_in'], name='listings_bo_check_i_da3308_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['guest', 'status'], name='listings_bo_guest_i_ef7653_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['property_type'], name='listings_li_propert_7a505c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['price_per_night'], name='listings_li_price_p_278f5d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_available', 'max_guests'], name='listings_li_is_avai_736943_idx'),
+        ),
+    ]
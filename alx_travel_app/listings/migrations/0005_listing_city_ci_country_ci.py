@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+def populate_normalized_location(apps, schema_editor):
+    # Lowercase in Python to match Listing.save(); SQLite's LOWER() only
+    # handles ASCII
+    Listing = apps.get_model('listings', 'Listing')
+    listings = list(Listing.objects.only('id', 'city', 'country'))
+    for listing in listings:
+        listing.city_ci = listing.city.lower()
+        listing.country_ci = listing.country.lower()
+    Listing.objects.bulk_update(listings, ['city_ci', 'country_ci'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_listing_booking_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='city_ci',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='country_ci',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_normalized_location, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:00
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+WINDOW_DAYS = 365
+
+
+def build_availability(apps, schema_editor):
+    Booking = apps.get_model('listings', 'Booking')
+    ListingAvailability = apps.get_model('listings', 'ListingAvailability')
+    start_date = timezone.now().date()
+    end_date = start_date + timedelta(days=WINDOW_DAYS)
+
+    bitmaps = {}
+    bookings = Booking.objects.filter(
+        status__in=['pending', 'confirmed'],
+        check_in__lt=end_date,
+        check_out__gt=start_date,
+    ).values_list('listing_id', 'check_in', 'check_out')
+    for listing_id, check_in, check_out in bookings:
+        bitmap = bitmaps.setdefault(listing_id, bytearray(WINDOW_DAYS))
+        first = max((check_in - start_date).days, 0)
+        last = min((check_out - start_date).days, WINDOW_DAYS)
+        bitmap[first:last] = b'\x01' * (last - first)
+
+    ListingAvailability.objects.bulk_create(
+        [
+            ListingAvailability(listing_id=listing_id, start_date=start_date, bitmap=bytes(bitmap))
+            for listing_id, bitmap in bitmaps.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_listing_city_ci_country_ci'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingAvailability',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='availability', serialize=False, to='listings.listing')),
+                ('start_date', models.DateField()),
+                ('bitmap', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'listing availabilities',
+            },
+        ),
+        migrations.RunPython(build_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_listingavailability'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['listing', 'check_in', 'check_out'], name='listings_bo_listing_1a8225_idx'),
+        ),
+    ]
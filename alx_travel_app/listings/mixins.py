@@ -0,0 +1,71 @@
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def get_related_lookups(serializer, prefix=''):
+    """
+    Walk a ModelSerializer's fields and return the (select_related,
+    prefetch_related) lookups needed to serialize it without extra queries.
+    """
+    model = serializer.Meta.model
+    select_related = []
+    prefetch_related = []
+
+    for field in serializer.fields.values():
+        if field.write_only or '.' in field.source or field.source == '*':
+            continue
+
+        many = isinstance(field, serializers.ListSerializer)
+        nested = field.child if many else field
+        if not isinstance(nested, serializers.ModelSerializer):
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = prefix + field.source
+        nested_select, nested_prefetch = get_related_lookups(nested, lookup + '__')
+
+        if many or model_field.one_to_many or model_field.many_to_many:
+            # Anything below a prefetched relation has to be prefetched too
+            prefetch_related.append(lookup)
+            prefetch_related.extend(nested_select + nested_prefetch)
+        else:
+            select_related.append(lookup)
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+
+    return select_related, prefetch_related
+
+
+@lru_cache(maxsize=None)
+def get_serializer_lookups(serializer_class):
+    return get_related_lookups(serializer_class())
+
+
+class AutoPrefetchMixin:
+    """
+    Eager-load the relations the view's serializer nests, derived from its
+    field tree so the lookups can't drift from the serializer.
+    """
+
+    def auto_prefetch(self, queryset, serializer_class=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        meta = getattr(serializer_class, 'Meta', None)
+        if getattr(meta, 'model', None) is not queryset.model:
+            return queryset
+
+        select_related, prefetch_related = get_serializer_lookups(serializer_class)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        return self.auto_prefetch(super().filter_queryset(queryset))
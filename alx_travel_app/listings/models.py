@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from datetime import timedelta
 import uuid
+from .cache import invalidate_listing_detail
 
 
 class Listing(models.Model):
@@ -26,26 +29,50 @@ class Listing(models.Model):
     address = models.TextField()
     city = models.CharField(max_length=100)
     country = models.CharField(max_length=100)
+    # Lowercased copies of city/country for indexed case-insensitive lookups
+    city_ci = models.CharField(max_length=100, db_index=True, editable=False)
+    country_ci = models.CharField(max_length=100, db_index=True, editable=False)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     amenities = models.JSONField(default=list)  # Store as list of strings
     is_available = models.BooleanField(default=True)
     host = models.ForeignKey(User, on_delete=models.CASCADE, related_name='listings')
+    # Denormalized review aggregates, maintained by Review.save()/delete
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.title} - {self.city}"
     
+    def save(self, *args, **kwargs):
+        self.city_ci = self.city.lower()
+        self.country_ci = self.country.lower()
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'city' in update_fields:
+                update_fields.add('city_ci')
+            if 'country' in update_fields:
+                update_fields.add('country_ci')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
     @property
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return sum(review.rating for review in reviews) / len(reviews)
+        if self.review_count:
+            return self.rating_sum / self.review_count
         return 0
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['property_type']),
+            models.Index(fields=['price_per_night']),
+            models.Index(fields=['is_available', 'max_guests']),
+        ]
 
 
 class Booking(models.Model):
@@ -56,6 +83,9 @@ class Booking(models.Model):
         ('completed', 'Completed'),
     ]
     
+    # Statuses that hold the listing's dates
+    ACTIVE_STATUSES = ['pending', 'confirmed']
+    
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='bookings')
     guest = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
     check_in = models.DateField()
@@ -70,16 +100,146 @@ class Booking(models.Model):
     def __str__(self):
         return f"{self.guest.username} - {self.listing.title}"
     
+    @staticmethod
+    def calculate_total_price(price_per_night, check_in, check_out):
+        nights = (check_out - check_in).days
+        if nights > 0:
+            return price_per_night * nights
+        return None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was priced so plain status edits skip the recompute
+        instance._original_stay = instance._stay()
+        return instance
+    
+    def _stay(self):
+        return (
+            self.__dict__.get('listing_id'),
+            self.__dict__.get('check_in'),
+            self.__dict__.get('check_out'),
+        )
+    
     def save(self, *args, **kwargs):
-        # Calculate total price based on nights and listing price
-        if self.check_in and self.check_out and self.listing:
-            nights = (self.check_out - self.check_in).days
-            if nights > 0:
-                self.total_price = self.listing.price_per_night * nights
+        # Price new bookings the caller didn't price, and re-price existing
+        # ones only when the listing or dates changed
+        if self._state.adding:
+            needs_pricing = not self.total_price
+        else:
+            needs_pricing = self._stay() != getattr(self, '_original_stay', self._stay())
+        
+        if needs_pricing and self.check_in and self.check_out and self.listing_id:
+            total_price = self.calculate_total_price(
+                self.listing.price_per_night, self.check_in, self.check_out
+            )
+            if total_price is not None:
+                self.total_price = total_price
         super().save(*args, **kwargs)
+        self._original_stay = self._stay()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['check_in']),
+            models.Index(fields=['guest', 'status']),
+            models.Index(fields=['listing', 'check_in', 'check_out']),
+        ]
+
+
+class ListingAvailability(models.Model):
+    """
+    Precomputed day-by-day occupancy for a listing, one byte per day
+    starting at start_date (1 = held by an active booking).
+    """
+    WINDOW_DAYS = 365
+    
+    listing = models.OneToOneField(
+        Listing,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='availability'
+    )
+    start_date = models.DateField()
+    bitmap = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Availability for listing {self.listing_id} from {self.start_date}"
+    
+    @classmethod
+    def rebuild(cls, listing_id, create=True):
+        """
+        Recompute the bitmap for a listing from its active bookings.
+        With create=False only an existing row is refreshed, which is safe
+        while the listing itself may be in the middle of a cascade delete.
+        """
+        start_date = timezone.now().date()
+        end_date = start_date + timedelta(days=cls.WINDOW_DAYS)
+        bitmap = bytearray(cls.WINDOW_DAYS)
+        
+        bookings = Booking.objects.filter(
+            listing_id=listing_id,
+            status__in=Booking.ACTIVE_STATUSES,
+            check_in__lt=end_date,
+            check_out__gt=start_date
+        ).values_list('check_in', 'check_out')
+        
+        for check_in, check_out in bookings:
+            first = max((check_in - start_date).days, 0)
+            last = min((check_out - start_date).days, cls.WINDOW_DAYS)
+            bitmap[first:last] = b'\x01' * (last - first)
+        
+        if create:
+            cls.objects.update_or_create(
+                listing_id=listing_id,
+                defaults={'start_date': start_date, 'bitmap': bytes(bitmap)}
+            )
+        else:
+            cls.objects.filter(listing_id=listing_id).update(
+                start_date=start_date, bitmap=bytes(bitmap), updated_at=timezone.now()
+            )
+    
+    @classmethod
+    def booked_listing_ids(cls, listings, check_in, check_out):
+        """
+        Return the ids of listings in the given queryset that have any
+        night between check_in and check_out held by an active booking.
+        """
+        booked = []
+        uncovered = []
+        
+        rows = cls.objects.filter(listing__in=listings).values_list(
+            'listing_id', 'start_date', 'bitmap'
+        )
+        for listing_id, start_date, bitmap in rows:
+            first = (check_in - start_date).days
+            last = (check_out - start_date).days
+            bitmap = bytes(bitmap)
+            if first < 0 or last > len(bitmap):
+                # Outside the precomputed window, ask the bookings directly
+                uncovered.append(listing_id)
+            elif any(bitmap[first:last]):
+                booked.append(listing_id)
+        
+        # Listings without a row (bookings outside the window when it was
+        # built, bulk writes) are unknown rather than free
+        fallback = models.Q(listing_id__in=uncovered) | models.Q(
+            listing__in=listings.filter(availability__isnull=True)
+        )
+        booked.extend(
+            Booking.objects.filter(
+                fallback,
+                status__in=Booking.ACTIVE_STATUSES,
+                check_in__lt=check_out,
+                check_out__gt=check_in
+            ).values_list('listing_id', flat=True)
+        )
+        
+        return booked
+    
+    class Meta:
+        verbose_name_plural = 'listing availabilities'
 
 
 class Review(models.Model):
@@ -93,8 +253,59 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored listing and rating so edits only apply the difference
+        instance._original_listing_id = instance.__dict__.get('listing_id')
+        instance._original_rating = instance.__dict__.get('rating')
+        return instance
+
     def __str__(self):
         return f"Review by {self.guest.username} - {self.rating} stars"
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            original_listing_id = getattr(self, '_original_listing_id', None)
+            original_rating = getattr(self, '_original_rating', None)
+            if not adding and (original_listing_id is None or original_rating is None):
+                # Deferred when loaded; read the stored values before they're overwritten
+                stored = Review.objects.filter(pk=self.pk).values_list('listing_id', 'rating').first()
+                if stored is None:
+                    adding = True
+                else:
+                    original_listing_id, original_rating = stored
+
+            super().save(*args, **kwargs)
+
+            # Keep the listing's rating aggregates in sync without recounting
+            if adding:
+                Listing.objects.filter(pk=self.listing_id).update(
+                    rating_sum=F('rating_sum') + self.rating,
+                    review_count=F('review_count') + 1,
+                )
+            elif self.listing_id != original_listing_id:
+                # Moved: take the review off the old listing and add it to the new one
+                Listing.objects.filter(pk=original_listing_id).update(
+                    rating_sum=F('rating_sum') - original_rating,
+                    review_count=F('review_count') - 1,
+                )
+                Listing.objects.filter(pk=self.listing_id).update(
+                    rating_sum=F('rating_sum') + self.rating,
+                    review_count=F('review_count') + 1,
+                )
+                invalidate_listing_detail(original_listing_id)
+            elif self.rating != original_rating:
+                Listing.objects.filter(pk=self.listing_id).update(
+                    rating_sum=F('rating_sum') + (self.rating - original_rating)
+                )
+
+            # Only after the aggregates are updated, so the cache never pairs
+            # the new review with the old rating
+            invalidate_listing_detail(self.listing_id)
+        self._original_listing_id = self.listing_id
+        self._original_rating = self.rating
     
     class Meta:
         ordering = ['-created_at']
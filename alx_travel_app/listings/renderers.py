@@ -0,0 +1,52 @@
+import datetime
+import decimal
+import orjson
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+
+def orjson_default(obj):
+    """
+    Encode the types orjson doesn't handle natively, the way DRF's
+    JSONEncoder does.
+    """
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson instead of the stdlib json module.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=orjson_default, option=self.options)
+
+
+def stream_json_array(items):
+    """
+    Encode an iterable as a JSON array one item at a time, for use as the
+    body of a StreamingHttpResponse.
+    """
+    yield b'['
+    for index, item in enumerate(items):
+        if index:
+            yield b','
+        yield orjson.dumps(item, default=orjson_default, option=ORJSONRenderer.options)
+    yield b']'
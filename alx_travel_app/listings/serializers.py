@@ -1,15 +1,46 @@
+import copy
+from functools import cached_property
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import models, transaction
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 from .models import Listing, Booking, Review, Payment
 
 
-class UserSerializer(serializers.ModelSerializer):
+class CachedFieldsMixin:
+    """
+    Build a ModelSerializer's field set once per class instead of on every
+    instantiation, and iterate readable fields from a precomputed tuple.
+    """
+    _fields_cache = {}
+
+    def get_fields(self):
+        cls = type(self)
+        if cls not in CachedFieldsMixin._fields_cache:
+            CachedFieldsMixin._fields_cache[cls] = super().get_fields()
+        # Fields are bound to their parent, so each instance needs its own copy
+        return copy.deepcopy(CachedFieldsMixin._fields_cache[cls])
+
+    @cached_property
+    def _readable_fields(self):
+        return tuple(
+            field for field in self.fields.values() if not field.write_only
+        )
+
+
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
+    
+    def to_representation(self, instance):
+        # Every field is a plain column, so read them straight off the
+        # (usually select_related) user instead of per-field serialization
+        return {name: getattr(instance, name) for name in self.Meta.fields}
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     guest = UserSerializer(read_only=True)
     
     class Meta:
@@ -18,25 +49,86 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ['guest', 'created_at']
 
 
-class ListingSerializer(serializers.ModelSerializer):
+class ListingListSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    """
+    Lightweight listing representation for browsing, without nested reviews.
+    """
     host = UserSerializer(read_only=True)
     average_rating = serializers.ReadOnlyField()
-    reviews = ReviewSerializer(many=True, read_only=True)
     
     class Meta:
         model = Listing
+        # Keep in sync with the only() columns in ListingViewSet.get_queryset
+        fields = [
+            'id', 'title', 'property_type', 'price_per_night', 'city',
+            'country', 'is_available', 'host', 'average_rating',
+            'review_count', 'created_at'
+        ]
+        read_only_fields = ['host', 'review_count', 'created_at']
+
+
+class ListingDetailSerializer(ListingListSerializer):
+    """
+    Full listing representation including its reviews.
+    """
+    reviews = ReviewSerializer(many=True, read_only=True)
+    
+    class Meta(ListingListSerializer.Meta):
         fields = [
             'id', 'title', 'description', 'property_type', 'price_per_night',
             'max_guests', 'bedrooms', 'beds', 'bathrooms', 'address', 'city',
             'country', 'latitude', 'longitude', 'amenities', 'is_available',
-            'host', 'average_rating', 'reviews', 'created_at'
+            'host', 'average_rating', 'review_count', 'reviews', 'created_at'
         ]
-        read_only_fields = ['host', 'created_at']
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingListSerializer(serializers.ListSerializer):
+    """
+    Serialize each distinct related object (listing, guest) once per list
+    and reuse that representation for every booking pointing at it, instead
+    of re-running the nested serializers row by row.
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        fields = self.child._readable_fields
+        nested = {
+            field.field_name: {}
+            for field in fields
+            if isinstance(field, serializers.BaseSerializer)
+        }
+        
+        results = []
+        for instance in iterable:
+            ret = {}
+            for field in fields:
+                seen = nested.get(field.field_name)
+                related_id = getattr(instance, f'{field.source}_id', None)
+                if seen is not None and related_id is not None:
+                    if related_id not in seen:
+                        seen[related_id] = field.to_representation(
+                            field.get_attribute(instance)
+                        )
+                    ret[field.field_name] = seen[related_id]
+                    continue
+                
+                try:
+                    attribute = field.get_attribute(instance)
+                except SkipField:
+                    continue
+                
+                check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+                if check_for_none is None:
+                    ret[field.field_name] = None
+                else:
+                    ret[field.field_name] = field.to_representation(attribute)
+            results.append(ret)
+        
+        return results
+
+
+class BookingSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     guest = UserSerializer(read_only=True)
-    listing = ListingSerializer(read_only=True)
+    listing = ListingDetailSerializer(read_only=True)
     listing_id = serializers.PrimaryKeyRelatedField(
         queryset=Listing.objects.all(), 
         source='listing',
@@ -51,6 +143,7 @@ class BookingSerializer(serializers.ModelSerializer):
             'created_at'
         ]
         read_only_fields = ['guest', 'total_price', 'created_at']
+        list_serializer_class = BookingListSerializer
     
     def validate(self, data):
         # Validate check-in/check-out dates
@@ -79,6 +172,53 @@ class BookingCreateSerializer(serializers.ModelSerializer):
             'listing', 'check_in', 'check_out', 'guests_count', 
             'special_requests'
         ]
+    
+    def check_availability(self, listing, check_in, check_out, instance=None):
+        overlapping = Booking.objects.filter(
+            listing=listing,
+            status__in=Booking.ACTIVE_STATUSES,
+            check_in__lt=check_out,
+            check_out__gt=check_in
+        )
+        if instance is not None:
+            overlapping = overlapping.exclude(pk=instance.pk)
+        if overlapping.exists():
+            raise serializers.ValidationError(
+                "This listing is already booked for the selected dates"
+            )
+    
+    def create(self, validated_data):
+        listing = validated_data['listing']
+        with transaction.atomic():
+            # Lock the listing so concurrent bookings for it are checked in turn
+            Listing.objects.select_for_update().get(pk=listing.pk)
+            self.check_availability(
+                listing, validated_data['check_in'], validated_data['check_out']
+            )
+            
+            # The listing is already loaded here, so price the stay up front
+            validated_data['total_price'] = Booking.calculate_total_price(
+                listing.price_per_night,
+                validated_data['check_in'],
+                validated_data['check_out']
+            )
+            return super().create(validated_data)
+    
+    def update(self, instance, validated_data):
+        listing = validated_data.get('listing', instance.listing)
+        check_in = validated_data.get('check_in', instance.check_in)
+        check_out = validated_data.get('check_out', instance.check_out)
+        with transaction.atomic():
+            Listing.objects.select_for_update().get(pk=listing.pk)
+            if instance.status in Booking.ACTIVE_STATUSES:
+                self.check_availability(listing, check_in, check_out, instance=instance)
+            
+            total_price = Booking.calculate_total_price(
+                listing.price_per_night, check_in, check_out
+            )
+            if total_price is not None:
+                validated_data['total_price'] = total_price
+            return super().update(instance, validated_data)
 
 
 class PaymentSerializer(serializers.ModelSerializer):
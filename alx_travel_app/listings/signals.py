@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import invalidate_listing_detail
+from .models import Booking, Listing, ListingAvailability, Review
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_listing_rating(sender, instance, **kwargs):
+    """
+    Subtract a deleted review from its listing's rating aggregates.
+    Runs for cascades and queryset deletes too, unlike Review.delete().
+    """
+    Listing.objects.filter(pk=instance.listing_id).update(
+        rating_sum=F('rating_sum') - instance.rating,
+        review_count=F('review_count') - 1,
+    )
+    invalidate_listing_detail(instance.listing_id)
+
+
+@receiver(post_save, sender=Booking)
+def refresh_listing_availability(sender, instance, **kwargs):
+    """
+    Rebuild the listing's availability bitmap whenever a booking changes,
+    and the previous listing's too when the booking moved.
+    """
+    # Booking.save only refreshes _original_stay after post_save has run
+    previous_listing_id = getattr(instance, '_original_stay', (None,))[0]
+    if previous_listing_id and previous_listing_id != instance.listing_id:
+        ListingAvailability.rebuild(previous_listing_id, create=False)
+    ListingAvailability.rebuild(instance.listing_id)
+
+
+@receiver(post_delete, sender=Booking)
+def refresh_listing_availability_on_delete(sender, instance, **kwargs):
+    """
+    Refresh the bitmap without creating a row: the delete may be cascading
+    from the listing (or its host), whose row must not be recreated.
+    """
+    ListingAvailability.rebuild(instance.listing_id, create=False)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_cached_listing(sender, instance, **kwargs):
+    invalidate_listing_detail(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_host_listings(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Cached listing details embed the host and each reviewer, so drop the
+    listings a user hosts or has reviewed when the user changes.
+    """
+    # Logins only touch last_login, which isn't part of the representation
+    if created or (update_fields and set(update_fields) <= {'last_login', 'password'}):
+        return
+    listing_ids = set(instance.listings.values_list('pk', flat=True))
+    listing_ids.update(instance.reviews.values_list('listing_id', flat=True))
+    invalidate_listing_detail(*listing_ids)
@@ -1,9 +1,16 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from .models import Listing, Booking, Review
+from rest_framework.renderers import JSONRenderer
+from .models import Listing, ListingAvailability, Booking, Review
+from .renderers import ORJSONRenderer
+from .serializers import BookingSerializer, ReviewSerializer
 from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 import json
 from celery import shared_task
 from django.core.mail import send_mail
@@ -95,6 +102,121 @@ class ListingAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['title'], 'Updated Title')
 
+    def test_listing_detail_cache_invalidated_on_update(self):
+        """Test that cached listing details are dropped when the listing changes"""
+        cache.clear()
+        response = self.client.get(f'/api/listings/{self.listing.id}/')
+        self.assertEqual(response.json()['title'], 'Beautiful Apartment in Paris')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.title = 'Renamed Apartment'
+            self.listing.save()
+        response = self.client.get(f'/api/listings/{self.listing.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], 'Renamed Apartment')
+
+    def test_listing_detail_cache_shared_across_pk_spellings(self):
+        """Test that a zero-padded pk does not serve a stale cached copy"""
+        cache.clear()
+        self.client.get(f'/api/listings/0{self.listing.id}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.title = 'Renamed Apartment'
+            self.listing.save()
+        response = self.client.get(f'/api/listings/0{self.listing.id}/')
+        self.assertEqual(response.json()['title'], 'Renamed Apartment')
+
+    def test_listing_detail_cache_respects_filters(self):
+        """Test that a cached detail is not served for filtered requests"""
+        cache.clear()
+        self.client.get(f'/api/listings/{self.listing.id}/')
+        response = self.client.get(f'/api/listings/{self.listing.id}/?city=rome')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_listing_detail_cache_invalidated_on_review(self):
+        """Test that cached listing details pick up new reviews and ratings"""
+        cache.clear()
+        booking = Booking.objects.create(
+            listing=self.listing,
+            guest=self.user2,
+            check_in=date.today() + timedelta(days=10),
+            check_out=date.today() + timedelta(days=15),
+            guests_count=2
+        )
+        self.client.get(f'/api/listings/{self.listing.id}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(
+                listing=self.listing, booking=booking, guest=self.user2, rating=4, comment='Nice'
+            )
+        response = self.client.get(f'/api/listings/{self.listing.id}/')
+        self.assertEqual(len(response.json()['reviews']), 1)
+        self.assertEqual(response.json()['average_rating'], 4)
+
+    def test_listing_detail_cache_invalidated_on_host_update(self):
+        """Test that cached listing details pick up changes to the host"""
+        cache.clear()
+        self.client.get(f'/api/listings/{self.listing.id}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Hosty'
+            self.user.save()
+        response = self.client.get(f'/api/listings/{self.listing.id}/')
+        self.assertEqual(response.json()['host']['first_name'], 'Hosty')
+
+    def test_listing_detail_cache_invalidated_on_reviewer_update(self):
+        """Test that cached listing details pick up changes to a reviewer"""
+        cache.clear()
+        booking = Booking.objects.create(
+            listing=self.listing,
+            guest=self.user2,
+            check_in=date.today() + timedelta(days=10),
+            check_out=date.today() + timedelta(days=15),
+            guests_count=2
+        )
+        Review.objects.create(
+            listing=self.listing, booking=booking, guest=self.user2, rating=4, comment='Nice'
+        )
+        self.client.get(f'/api/listings/{self.listing.id}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user2.first_name = 'Guesty'
+            self.user2.save()
+        response = self.client.get(f'/api/listings/{self.listing.id}/')
+        self.assertEqual(response.json()['reviews'][0]['guest']['first_name'], 'Guesty')
+
+    def test_filter_listings_by_stay_dates_without_availability_row(self):
+        """Test that listings with no availability row fall back to bookings"""
+        Booking.objects.bulk_create([
+            Booking(
+                listing=self.listing,
+                guest=self.user2,
+                check_in=date.today() + timedelta(days=400),
+                check_out=date.today() + timedelta(days=405),
+                guests_count=2,
+                total_price=750
+            )
+        ])
+        stay = (date.today() + timedelta(days=401), date.today() + timedelta(days=403))
+        response = self.client.get(
+            '/api/listings/?check_in=%s&check_out=%s' % stay
+        )
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_delete_listing_with_bookings(self):
+        """Test that deleting a booked listing leaves no availability row"""
+        Booking.objects.create(
+            listing=self.listing,
+            guest=self.user2,
+            check_in=date.today() + timedelta(days=10),
+            check_out=date.today() + timedelta(days=15),
+            guests_count=2
+        )
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete(f'/api/listings/{self.listing.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(ListingAvailability.objects.exists())
+
     def test_update_others_listing(self):
         """Test that users cannot update others' listings"""
         self.client.force_authenticate(user=self.user2)
@@ -112,6 +234,71 @@ class ListingAPITestCase(APITestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['city'], 'Paris')
 
+    def test_filter_listings_by_city_substring(self):
+        """Test that a leading % filters listings by city substring"""
+        response = self.client.get('/api/listings/?city=%25ari')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get('/api/listings/?city=ari')
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_filter_listings_by_stay_dates(self):
+        """Test that listings booked for the requested stay are excluded"""
+        Booking.objects.create(
+            listing=self.listing,
+            guest=self.user2,
+            check_in=date.today() + timedelta(days=10),
+            check_out=date.today() + timedelta(days=15),
+            guests_count=2
+        )
+        overlapping = (date.today() + timedelta(days=12), date.today() + timedelta(days=20))
+        response = self.client.get(
+            '/api/listings/?check_in=%s&check_out=%s' % overlapping
+        )
+        self.assertEqual(len(response.data['results']), 0)
+
+        free = (date.today() + timedelta(days=15), date.today() + timedelta(days=20))
+        response = self.client.get(
+            '/api/listings/?check_in=%s&check_out=%s' % free
+        )
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_filter_listings_by_stay_dates_after_booking_moves(self):
+        """Test that moving a booking frees its nights on the old listing"""
+        other_listing = Listing.objects.create(
+            title="Cozy Loft in Lyon",
+            description="Loft near the old town",
+            property_type="apartment",
+            price_per_night=100.00,
+            max_guests=2,
+            bedrooms=1,
+            beds=1,
+            bathrooms=1,
+            address="5 Lyon Street",
+            city="Lyon",
+            country="France",
+            host=self.user
+        )
+        booking = Booking.objects.create(
+            listing=self.listing,
+            guest=self.user2,
+            check_in=date.today() + timedelta(days=10),
+            check_out=date.today() + timedelta(days=15),
+            guests_count=2
+        )
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.listing = other_listing
+        booking.save()
+
+        stay = (date.today() + timedelta(days=12), date.today() + timedelta(days=14))
+        response = self.client.get(
+            '/api/listings/?check_in=%s&check_out=%s' % stay
+        )
+        self.assertEqual(
+            [result['id'] for result in response.data['results']], [self.listing.id]
+        )
+
     def test_filter_listings_by_price(self):
         """Test filtering listings by price range"""
         response = self.client.get('/api/listings/?min_price=100&max_price=200')
@@ -220,6 +407,51 @@ class BookingAPITestCase(APITestCase):
         self.booking.refresh_from_db()
         self.assertEqual(self.booking.status, 'cancelled')
 
+    def test_booking_overlapping_dates_rejected(self):
+        """Test that bookings overlapping an active booking are rejected"""
+        self.client.force_authenticate(user=self.other_user)
+        overlapping_data = self.valid_booking_data.copy()
+        overlapping_data['check_in'] = str(date.today() + timedelta(days=12))
+        overlapping_data['check_out'] = str(date.today() + timedelta(days=18))
+        
+        response = self.client.post(
+            '/api/bookings/',
+            data=json.dumps(overlapping_data),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('already booked', str(response.data))
+
+    def test_booking_list_serializer_matches_single(self):
+        """Test that batched booking serialization matches per-booking output"""
+        Booking.objects.create(
+            listing=self.listing,
+            guest=self.guest,
+            check_in=date.today() + timedelta(days=30),
+            check_out=date.today() + timedelta(days=32),
+            guests_count=1
+        )
+        bookings = Booking.objects.all()
+        expected = [BookingSerializer(booking).data for booking in bookings]
+        self.assertEqual(BookingSerializer(bookings, many=True).data, expected)
+
+    def test_cancel_booking_frees_dates(self):
+        """Test that cancelling a booking makes its dates bookable again"""
+        self.client.force_authenticate(user=self.guest)
+        self.client.post(f'/api/bookings/{self.booking.id}/cancel/')
+        
+        availability = ListingAvailability.objects.get(listing=self.listing)
+        self.assertFalse(any(bytes(availability.bitmap)))
+
+    def test_booking_status_change_keeps_price(self):
+        """Test that saving a status change doesn't re-price the booking"""
+        booking = Booking.objects.get(pk=self.booking.pk)
+        Listing.objects.filter(pk=self.listing.pk).update(price_per_night=999)
+        booking.status = 'completed'
+        booking.save()
+        booking.refresh_from_db()
+        self.assertEqual(booking.total_price, 500)
+
     def test_booking_validation(self):
         """Test booking validation for invalid dates"""
         self.client.force_authenticate(user=self.guest)
@@ -297,6 +529,157 @@ class ErrorScenarioTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('not available', str(response.data))
 
+
+class ListingRatingTestCase(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='testhost', password='testpass123')
+        self.guest = User.objects.create_user(username='testguest', password='testpass123')
+        self.listing = Listing.objects.create(
+            title="Test Listing",
+            description="Test description",
+            property_type="apartment",
+            price_per_night=100.00,
+            max_guests=4,
+            bedrooms=1,
+            beds=2,
+            bathrooms=1,
+            address="Test Address",
+            city="Test City",
+            country="Test Country",
+            host=self.host
+        )
+
+    def create_review(self, rating, days=10):
+        booking = Booking.objects.create(
+            listing=self.listing,
+            guest=self.guest,
+            check_in=date.today() + timedelta(days=days),
+            check_out=date.today() + timedelta(days=days + 2),
+            guests_count=1
+        )
+        return Review.objects.create(
+            listing=self.listing,
+            booking=booking,
+            guest=self.guest,
+            rating=rating,
+            comment="Great stay"
+        )
+
+    def test_review_create_updates_aggregates(self):
+        """Test that new reviews are added to the listing's rating aggregates"""
+        self.create_review(4)
+        self.create_review(5, days=20)
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.review_count, 2)
+        self.assertEqual(self.listing.rating_sum, 9)
+        self.assertEqual(self.listing.average_rating, 4.5)
+
+    def test_review_edit_applies_rating_difference(self):
+        """Test that editing a review only applies the rating difference"""
+        self.create_review(2)
+        review = Review.objects.get()
+        review.rating = 5
+        review.save()
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.review_count, 1)
+        self.assertEqual(self.listing.rating_sum, 5)
+
+    def test_review_edit_with_deferred_rating(self):
+        """Test that editing a review loaded without its rating still applies the difference"""
+        self.create_review(3)
+        review = Review.objects.only('id', 'listing_id', 'comment').get()
+        review.rating = 5
+        review.save()
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.review_count, 1)
+        self.assertEqual(self.listing.rating_sum, 5)
+
+    def test_review_move_updates_both_listings(self):
+        """Test that moving a review to another listing moves its aggregates"""
+        other_listing = Listing.objects.create(
+            title="Other Listing",
+            description="Test description",
+            property_type="apartment",
+            price_per_night=80.00,
+            max_guests=2,
+            bedrooms=1,
+            beds=1,
+            bathrooms=1,
+            address="Other Address",
+            city="Test City",
+            country="Test Country",
+            host=self.host
+        )
+        self.create_review(3)
+        review = Review.objects.get()
+        review.listing = other_listing
+        review.save()
+
+        self.listing.refresh_from_db()
+        other_listing.refresh_from_db()
+        self.assertEqual((self.listing.rating_sum, self.listing.review_count), (0, 0))
+        self.assertEqual((other_listing.rating_sum, other_listing.review_count), (3, 1))
+
+    def test_listing_reviews_are_paginated(self):
+        """Test that the listing reviews action returns a paginated page"""
+        self.create_review(4)
+        response = self.client.get(f'/api/listings/{self.listing.id}/reviews/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['guest']['username'], 'testguest')
+
+    def test_review_list_matches_serializer(self):
+        """Test that the flat review list has the ReviewSerializer shape"""
+        self.create_review(4)
+        self.create_review(5, days=20)
+        self.client.force_authenticate(user=self.guest)
+        response = self.client.get('/api/reviews/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = ReviewSerializer(Review.objects.all(), many=True).data
+        self.assertEqual(response.json()['results'], json.loads(json.dumps(expected)))
+
+    def test_review_export_streams_all_reviews(self):
+        """Test that the review export streams the full list as JSON"""
+        self.create_review(4)
+        self.create_review(5, days=20)
+        self.client.force_authenticate(user=self.guest)
+        response = self.client.get(f'/api/reviews/export/?listing={self.listing.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        reviews = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([review['rating'] for review in reviews], [5, 4])
+
+    def test_sync_listing_ratings_repairs_drift(self):
+        """Test that the sync command recomputes drifted rating aggregates"""
+        self.create_review(4)
+        Listing.objects.filter(pk=self.listing.pk).update(rating_sum=0, review_count=0)
+        call_command('sync_listing_ratings', stdout=StringIO())
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.review_count, 1)
+        self.assertEqual(self.listing.rating_sum, 4)
+
+    def test_review_delete_updates_aggregates(self):
+        """Test that deleting a review, directly or by cascade, is subtracted"""
+        self.create_review(3)
+        review = self.create_review(5, days=20)
+        review.delete()
+        Booking.objects.all().delete()
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.review_count, 0)
+        self.assertEqual(self.listing.rating_sum, 0)
+        self.assertEqual(self.listing.average_rating, 0)
+
+
+class ORJSONRendererTestCase(TestCase):
+    def test_render_matches_drf_json_renderer(self):
+        """Test that the orjson renderer encodes like DRF's JSONRenderer"""
+        data = {'price': Decimal('150.50'), 'token': b'abc', 1: 'one'}
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data))
+        )
+
+
 @shared_task
 def send_payment_confirmation_email(payment_id, customer_email):
     """
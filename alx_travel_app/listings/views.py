@@ -1,12 +1,20 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from .models import Listing, Booking, Review, Payment
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_date
+from .models import Listing, ListingAvailability, Booking, Review, Payment
+from .cache import LISTING_DETAIL_TIMEOUT, listing_detail_cache_key
+from .mixins import AutoPrefetchMixin
+from .renderers import stream_json_array
 from .serializers import (
-    ListingSerializer, 
+    ListingListSerializer,
+    ListingDetailSerializer,
     BookingSerializer, 
     BookingCreateSerializer,
     ReviewSerializer,
@@ -28,7 +36,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # Write permissions are only allowed to the owner
-        return obj.host == request.user
+        return obj.host_id == request.user.id
 
 
 class IsGuestOrHost(permissions.BasePermission):
@@ -37,23 +45,26 @@ class IsGuestOrHost(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         # Guests can view their own bookings
-        if obj.guest == request.user:
+        if obj.guest_id == request.user.id:
             return True
         
         # Hosts can view bookings for their listings
-        if obj.listing.host == request.user:
+        if obj.listing.host_id == request.user.id:
             return True
         
         return False
 
 
-class ListingViewSet(viewsets.ModelViewSet):
+class ListingViewSet(AutoPrefetchMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing property listings.
     """
     queryset = Listing.objects.all()
-    serializer_class = ListingSerializer
+    serializer_class = ListingDetailSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    action_serializers = {
+        'list': ListingListSerializer,
+    }
 
     def get_queryset(self):
         """
@@ -62,15 +73,21 @@ class ListingViewSet(viewsets.ModelViewSet):
         """
         queryset = Listing.objects.all()
         
-        # Filter by city
+        # Filter by city (a leading % requests a substring match)
         city = self.request.query_params.get('city', None)
         if city:
-            queryset = queryset.filter(city__icontains=city)
+            if city.startswith('%'):
+                queryset = queryset.filter(city__icontains=city.strip('%'))
+            else:
+                queryset = queryset.filter(city_ci=city.lower())
         
-        # Filter by country
+        # Filter by country (a leading % requests a substring match)
         country = self.request.query_params.get('country', None)
         if country:
-            queryset = queryset.filter(country__icontains=country)
+            if country.startswith('%'):
+                queryset = queryset.filter(country__icontains=country.strip('%'))
+            else:
+                queryset = queryset.filter(country_ci=country.lower())
         
         # Filter by property type
         property_type = self.request.query_params.get('property_type', None)
@@ -95,7 +112,58 @@ class ListingViewSet(viewsets.ModelViewSet):
         if available and available.lower() == 'true':
             queryset = queryset.filter(is_available=True)
         
-        return queryset.select_related('host').prefetch_related('reviews')
+        # Filter out listings already booked for the requested stay
+        check_in = parse_date(self.request.query_params.get('check_in', ''))
+        check_out = parse_date(self.request.query_params.get('check_out', ''))
+        if check_in and check_out and check_in < check_out:
+            queryset = queryset.exclude(
+                pk__in=ListingAvailability.booked_listing_ids(queryset, check_in, check_out)
+            )
+        
+        # Browsing only needs the columns ListingListSerializer renders
+        if self.action == 'list':
+            queryset = queryset.only(
+                'id', 'title', 'property_type', 'price_per_night', 'city',
+                'country', 'is_available', 'created_at', 'rating_sum',
+                'review_count', 'host__id', 'host__username', 'host__email',
+                'host__first_name', 'host__last_name'
+            )
+        
+        return queryset
+
+    def get_serializer_class(self):
+        """
+        Use a lightweight serializer without nested reviews for listing.
+        """
+        return self.action_serializers.get(self.action, self.serializer_class)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Serve listing details from the cache of rendered JSON when possible.
+        Entries are dropped whenever the listing or its reviews change.
+        """
+        renderer = request.accepted_renderer
+        # Query parameters filter the queryset, so only bare requests are cached
+        if renderer.format != 'json' or request.query_params:
+            return super().retrieve(request, *args, **kwargs)
+        
+        # Normalise the pk so '01' and '1' share the key that gets invalidated
+        try:
+            listing_id = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+        cache_key = listing_detail_cache_key(listing_id)
+        content = cache.get(cache_key)
+        if content is not None:
+            return HttpResponse(content, content_type=renderer.media_type)
+        
+        response = super().retrieve(request, *args, **kwargs)
+        content = renderer.render(
+            response.data, request.accepted_media_type, self.get_renderer_context()
+        )
+        cache.set(cache_key, content, LISTING_DETAIL_TIMEOUT)
+        # Reuse the rendered body rather than rendering the Response again
+        return HttpResponse(content, content_type=renderer.media_type)
 
     def perform_create(self, serializer):
         """
@@ -103,7 +171,7 @@ class ListingViewSet(viewsets.ModelViewSet):
         """
         serializer.save(host=self.request.user)
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], serializer_class=BookingSerializer)
     def bookings(self, request, pk=None):
         """
         Get all bookings for a specific listing.
@@ -111,33 +179,50 @@ class ListingViewSet(viewsets.ModelViewSet):
         """
         listing = self.get_object()
         
-        if listing.host != request.user:
+        if listing.host_id != request.user.id:
             return Response(
                 {"detail": "You can only view bookings for your own listings."},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        bookings = listing.bookings.all()
+        bookings = self.auto_prefetch(listing.bookings.all())
+        
+        page = self.paginate_queryset(bookings)
+        if page is not None:
+            serializer = BookingSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
         serializer = BookingSerializer(bookings, many=True)
         return Response(serializer.data)
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], serializer_class=ReviewSerializer)
     def reviews(self, request, pk=None):
         """
         Get all reviews for a specific listing.
         """
         listing = self.get_object()
-        reviews = listing.reviews.all()
+        reviews = self.auto_prefetch(listing.reviews.order_by('-created_at'))
+        
+        page = self.paginate_queryset(reviews)
+        if page is not None:
+            serializer = ReviewSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
         serializer = ReviewSerializer(reviews, many=True)
         return Response(serializer.data)
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(AutoPrefetchMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing bookings.
     """
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated, IsGuestOrHost]
+    action_serializers = {
+        'create': BookingCreateSerializer,
+        'update': BookingCreateSerializer,
+        'partial_update': BookingCreateSerializer,
+    }
 
     def get_queryset(self):
         """
@@ -145,10 +230,14 @@ class BookingViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
         
-        # Get bookings where user is guest OR user is host of the listing
-        queryset = Booking.objects.filter(
-            Q(guest=user) | Q(listing__host=user)
-        ).select_related('listing', 'guest', 'listing__host')
+        # Get bookings where user is guest OR user is host of the listing;
+        # plain guests skip the join against listings entirely
+        if self.user_is_host:
+            queryset = Booking.objects.filter(
+                Q(guest=user) | Q(listing__host=user)
+            )
+        else:
+            queryset = Booking.objects.filter(guest=user)
         
         # Filter by status if provided
         status_filter = self.request.query_params.get('status', None)
@@ -162,13 +251,18 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @cached_property
+    def user_is_host(self):
+        """
+        Whether the requesting user hosts any listings, checked once per request.
+        """
+        return self.request.user.listings.exists()
+
     def get_serializer_class(self):
         """
         Use different serializers for creation and retrieval.
         """
-        if self.action in ['create', 'update', 'partial_update']:
-            return BookingCreateSerializer
-        return BookingSerializer
+        return self.action_serializers.get(self.action, self.serializer_class)
 
     def perform_create(self, serializer):
         """
@@ -183,7 +277,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         """
         booking = self.get_object()
         
-        if booking.guest != request.user:
+        if booking.guest_id != request.user.id:
             return Response(
                 {"detail": "You can only cancel your own bookings."},
                 status=status.HTTP_403_FORBIDDEN
@@ -195,10 +289,16 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # A single UPDATE; nothing but the status changes here
         booking.status = 'cancelled'
-        booking.save()
+        booking.updated_at = timezone.now()
+        Booking.objects.filter(pk=booking.pk).update(
+            status=booking.status, updated_at=booking.updated_at
+        )
+        # update() sends no signals, and cancelling frees the dates
+        ListingAvailability.rebuild(booking.listing_id)
         
-        serializer = self.get_serializer(booking)
+        serializer = BookingSerializer(booking, context=self.get_serializer_context())
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
@@ -208,7 +308,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         """
         booking = self.get_object()
         
-        if booking.listing.host != request.user:
+        if booking.listing.host_id != request.user.id:
             return Response(
                 {"detail": "Only the host can confirm bookings."},
                 status=status.HTTP_403_FORBIDDEN
@@ -220,14 +320,18 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Pending and confirmed both hold the dates, so availability is unchanged
         booking.status = 'confirmed'
-        booking.save()
+        booking.updated_at = timezone.now()
+        Booking.objects.filter(pk=booking.pk).update(
+            status=booking.status, updated_at=booking.updated_at
+        )
         
-        serializer = self.get_serializer(booking)
+        serializer = BookingSerializer(booking, context=self.get_serializer_context())
         return Response(serializer.data)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(AutoPrefetchMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and creating reviews.
     """
@@ -245,7 +349,61 @@ class ReviewViewSet(viewsets.ModelViewSet):
         if listing_id:
             queryset = queryset.filter(listing_id=listing_id)
         
-        return queryset.select_related('guest', 'listing')
+        return queryset
+
+    def get_review_rows(self):
+        """
+        Read the filtered reviews as plain rows for the flat read paths.
+        """
+        return self.filter_queryset(self.get_queryset()).values(
+            'id', 'rating', 'comment', 'created_at',
+            'guest__id', 'guest__username', 'guest__email',
+            'guest__first_name', 'guest__last_name'
+        )
+
+    def flatten_reviews(self, rows):
+        """
+        Shape review rows like ReviewSerializer output.
+        """
+        created_at = serializers.DateTimeField()
+        for row in rows:
+            yield {
+                'id': row['id'],
+                'guest': {
+                    'id': row['guest__id'],
+                    'username': row['guest__username'],
+                    'email': row['guest__email'],
+                    'first_name': row['guest__first_name'],
+                    'last_name': row['guest__last_name'],
+                },
+                'rating': row['rating'],
+                'comment': row['comment'],
+                'created_at': created_at.to_representation(row['created_at']),
+            }
+
+    def list(self, request, *args, **kwargs):
+        """
+        Read reviews as plain rows and shape them like ReviewSerializer,
+        skipping per-field serializer work on the hot read path.
+        """
+        queryset = self.get_review_rows()
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(list(self.flatten_reviews(page)))
+        return Response(list(self.flatten_reviews(queryset)))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every matching review as one unpaginated JSON array,
+        reading rows in chunks so memory stays flat for large exports.
+        """
+        rows = self.get_review_rows().iterator(chunk_size=500)
+        return StreamingHttpResponse(
+            stream_json_array(self.flatten_reviews(rows)),
+            content_type='application/json'
+        )
 
     def perform_create(self, serializer):
         """